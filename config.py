@@ -1,65 +1,96 @@
 #Configuration management for LLM Orchestrator
 
 import os
+import sys
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Mapping, Tuple
 from dotenv import load_dotenv
 
 # Load variables from .env file into environment
-load_dotenv()
+# Production reads real environment variables, so .env parsing is skipped there
+if os.getenv("APP_ENV", "dev") != "production":
+    load_dotenv()
+
+# Configuration for each supported model (read-only)
+# Model names are interned so routing lookups can compare by identity
+_MODEL_CONFIG: Mapping[str, Mapping[str, Any]] = MappingProxyType({
+    sys.intern("gpt-4"): MappingProxyType({
+        "provider": "openai",
+        "cost_per_1k": 0.03,
+        "speed": "slow",
+        "quality": "high",
+        "capabilities": ("code", "reasoning", "writing", "complex")
+    }),
+    sys.intern("gpt-3.5-turbo"): MappingProxyType({
+        "provider": "openai",
+        "cost_per_1k": 0.001,
+        "speed": "fast",
+        "quality": "medium",
+        "capabilities": ("general", "writing", "simple")
+    }),
+    sys.intern("claude-sonnet-4"): MappingProxyType({
+        "provider": "anthropic",
+        "cost_per_1k": 0.015,
+        "speed": "medium",
+        "quality": "high",
+        "capabilities": ("reasoning", "writing", "analysis")
+    }),
+    sys.intern("claude-haiku-4"): MappingProxyType({
+        "provider": "anthropic",
+        "cost_per_1k": 0.0008,
+        "speed": "very_fast",
+        "quality": "medium",
+        "capabilities": ("general", "simple", "fast")
+    })
+})
+
+# Model ids sent to provider APIs, resolved once here
+# (the router hands these straight to providers)
+_WIRE_MODEL_IDS: Mapping[str, str] = MappingProxyType({
+    "gpt-4": "gpt-4",
+    "gpt-3.5-turbo": "gpt-3.5-turbo",
+    "claude-sonnet-4": "claude-sonnet-4-20250514",
+    "claude-haiku-4": "claude-haiku-4-20250611"
+})
+
+# Intent to Model Mapping (read-only)
+# Intent and model names are interned, like the MODEL_CONFIG keys
+_INTENT_ROUTING: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+    sys.intern(intent): tuple(sys.intern(model) for model in models)
+    for intent, models in (
+        ("code_generation", ("gpt-4", "gpt-3.5-turbo")),
+        ("education", ("gpt-4", "claude-sonnet-4", "gpt-3.5-turbo")),
+        ("writing", ("claude-sonnet-4", "gpt-4", "gpt-3.5-turbo")),
+        ("translation", ("gpt-3.5-turbo", "claude-haiku-4")),
+        ("summarization", ("claude-haiku-4", "gpt-3.5-turbo")),
+        ("general", ("gpt-3.5-turbo", "claude-haiku-4"))
+    )
+})
 
 # Main configuration class for the project
+# Frozen so settings are read once at import and can't be changed by accident
+@dataclass(frozen=True, slots=True)
 class Config:
     
     # API keys for different providers
     # These are read from environment variables
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
-    ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY", "")
+    OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
+    ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")
     
     # Token and request related settings
     # Max tokens before cooldown is applied
-    TOKEN_COOLDOWN_THRESHOLD = int(os.getenv("TOKEN_COOLDOWN_THRESHOLD", "5000"))
-    COOLDOWN_DURATION_SECONDS = int(os.getenv("COOLDOWN_DURATION_SECONDS", "300"))
-    REQUEST_TIMEOUT_SECONDS = int(os.getenv("REQUEST_TIMEOUT_SECONDS", "30"))
+    TOKEN_COOLDOWN_THRESHOLD: int = int(os.getenv("TOKEN_COOLDOWN_THRESHOLD", "5000"))
+    COOLDOWN_DURATION_SECONDS: int = int(os.getenv("COOLDOWN_DURATION_SECONDS", "300"))
+    REQUEST_TIMEOUT_SECONDS: int = int(os.getenv("REQUEST_TIMEOUT_SECONDS", "30"))
+    
+    # Configuration for each supported model (read-only)
+    MODEL_CONFIG: Mapping[str, Mapping[str, Any]] = field(default_factory=lambda: _MODEL_CONFIG)
     
-    # Configuration for each supported model
-    MODEL_CONFIG = {
-        "gpt-4": {
-            "provider": "openai",
-            "cost_per_1k": 0.03,
-            "speed": "slow",
-            "quality": "high",
-            "capabilities": ["code", "reasoning", "writing", "complex"]
-        },
-        "gpt-3.5-turbo": {
-            "provider": "openai",
-            "cost_per_1k": 0.001,
-            "speed": "fast",
-            "quality": "medium",
-            "capabilities": ["general", "writing", "simple"]
-        },
-        "claude-sonnet-4": {
-            "provider": "anthropic",
-            "cost_per_1k": 0.015,
-            "speed": "medium",
-            "quality": "high",
-            "capabilities": ["reasoning", "writing", "analysis"]
-        },
-        "claude-haiku-4": {
-            "provider": "anthropic",
-            "cost_per_1k": 0.0008,
-            "speed": "very_fast",
-            "quality": "medium",
-            "capabilities": ["general", "simple", "fast"]
-        }
-    }
+    # Config model name -> model id used in provider API calls
+    WIRE_MODEL_IDS: Mapping[str, str] = field(default_factory=lambda: _WIRE_MODEL_IDS)
     
-    # Intent to Model Mapping
-    INTENT_ROUTING = {
-        "code_generation": ["gpt-4", "gpt-3.5-turbo"],
-        "education": ["gpt-4", "claude-sonnet-4", "gpt-3.5-turbo"],
-        "writing": ["claude-sonnet-4", "gpt-4", "gpt-3.5-turbo"],
-        "translation": ["gpt-3.5-turbo", "claude-haiku-4"],
-        "summarization": ["claude-haiku-4", "gpt-3.5-turbo"],
-        "general": ["gpt-3.5-turbo", "claude-haiku-4"]
-    }
+    # Intent to Model Mapping (read-only)
+    INTENT_ROUTING: Mapping[str, Tuple[str, ...]] = field(default_factory=lambda: _INTENT_ROUTING)
 
 config = Config()
\ No newline at end of file
@@ -1,6 +1,6 @@
 # This file makes intent detection tools easy to import from this folder
 
 # Import main detector class and helper function from detector.py
-from .detector import IntentDetector, detect_intent, detector
+from .detector import Intent, IntentDetector, detect_intent, detect_intent_with_confidence, detector
 
-__all__ = ["IntentDetector", "detect_intent", "detector"]
\ No newline at end of file
+__all__ = ["Intent", "IntentDetector", "detect_intent", "detect_intent_with_confidence", "detector"]
\ No newline at end of file
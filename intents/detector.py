@@ -2,7 +2,70 @@
 #Intent classification module
 #Deterministic, rule-based intent detection
 
-from typing import Dict, List
+import re
+import sys
+from enum import IntEnum
+from typing import Dict, List, Optional, Pattern, Sequence, Set, Tuple, Type
+
+# pyahocorasick is optional, a precompiled regex is used when it is missing
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Intern intent names and keywords, and store keyword lists as tuples
+# Interned strings let dict lookups compare by identity first
+def _intern_keywords(intent_keywords: Dict[str, Sequence[str]]) -> Dict[str, Tuple[str, ...]]:
+    
+    return {
+        sys.intern(intent): tuple(sys.intern(keyword) for keyword in keywords)
+        for intent, keywords in intent_keywords.items()
+    }
+
+# Map every keyword to the intents it belongs to
+def _keyword_intents(
+    intent_keywords: Dict[str, Tuple[str, ...]],
+    intent_enum: Type[IntEnum]
+) -> Dict[str, Tuple[IntEnum, ...]]:
+    
+    keyword_intents: Dict[str, List[IntEnum]] = {}
+    for name, keywords in intent_keywords.items():
+        intent = intent_enum[name.upper()]
+        for keyword in keywords:
+            keyword_intents.setdefault(keyword, []).append(intent)
+    
+    return {keyword: tuple(intents) for keyword, intents in keyword_intents.items()}
+
+# Build an Aho-Corasick automaton over all intent keywords
+# Each keyword stores itself and the intents it belongs to,
+# so one pass over the prompt finds every keyword match
+def _build_automaton(keyword_intents: Dict[str, Tuple[int, ...]]) -> "ahocorasick.Automaton":
+    
+    automaton = ahocorasick.Automaton()
+    for keyword, intents in keyword_intents.items():
+        automaton.add_word(keyword, (keyword, intents))
+    automaton.make_automaton()
+    
+    return automaton
+
+# Build one regex that finds keywords at every position of the prompt
+# (used when pyahocorasick is not installed)
+# The lookahead is zero-width, so overlapping keywords are all found,
+# and longer keywords come first so each position reports its longest match
+def _build_pattern(keywords: Sequence[str]) -> Pattern:
+    
+    ordered = sorted(keywords, key=len, reverse=True)
+    return re.compile("(?=(" + "|".join(map(re.escape, ordered)) + "))")
+
+# For every keyword, list the keywords that are its prefix (itself included)
+# A regex match only reports the longest keyword at a position, but shorter
+# keywords starting there matched too (e.g. "javascript" contains "java")
+def _build_prefixes(keywords: Sequence[str]) -> Dict[str, Tuple[str, ...]]:
+    
+    return {
+        keyword: tuple(other for other in keywords if keyword.startswith(other))
+        for keyword in keywords
+    }
 
 # This class decides what the user wants (coding, writing, learning, etc.)
 class IntentDetector:
@@ -10,7 +73,7 @@ class IntentDetector:
     # If a word from the list appears in prompt, that intent gets score
     
     # Intent definitions with keywords
-    INTENT_KEYWORDS = {
+    INTENT_KEYWORDS = _intern_keywords({
         "code_generation": [
             "code", "program", "function", "class", "script",
             "python", "javascript", "java", "implement", "debug",
@@ -32,57 +95,116 @@ class IntentDetector:
             "summarize", "summary", "tldr", "brief", "condense",
             "key points", "main idea", "overview"
         ]
-    }
+    })
     
-    # This function checks the prompt and decides intent
-    def detect(self, prompt: str) -> str:
-
-       # Convert text to lowercase for easy matching
-
-        prompt_lower = prompt.lower()
+    # Intents that have keywords, numbered in INTENT_KEYWORDS order
+    # Built from the table, so the two always agree
+    # Used as list indexes for per-intent scores
+    Intent = IntEnum(
+        "Intent",
+        [name.upper() for name in INTENT_KEYWORDS],
+        start=0,
+        module=__name__,
+        qualname="Intent"
+    )
+    
+    # Keyword matcher, built once when the class is loaded
+    _KEYWORD_INTENTS = _keyword_intents(INTENT_KEYWORDS, Intent)
+    
+    if ahocorasick is not None:
+        _AUTOMATON: Optional["ahocorasick.Automaton"] = _build_automaton(_KEYWORD_INTENTS)
+    else:
+        _AUTOMATON = None
+        _PATTERN = _build_pattern(list(_KEYWORD_INTENTS))
+        _PREFIXES = _build_prefixes(list(_KEYWORD_INTENTS))
+    
+    # Intent names and keyword counts, indexed by Intent
+    _INTENT_NAMES: Tuple[str, ...] = tuple(INTENT_KEYWORDS)
+    _INTENT_INDEX: Dict[str, IntEnum] = {intent.name.lower(): intent for intent in Intent}
+    _KEYWORD_COUNTS: Tuple[int, ...] = tuple(len(keywords) for keywords in INTENT_KEYWORDS.values())
+    
+    # Scan the lowercased prompt once and count matched keywords per intent
+    # Each keyword is counted once, even if it appears many times
+    # Returns a list of scores indexed by Intent
+    def _scan(self, prompt_lower: str) -> List[int]:
+        
+        scores = [0] * len(self.Intent)
+        seen: Set[str] = set()
+        
+        if self._AUTOMATON is not None:
+            for _, (keyword, intents) in self._AUTOMATON.iter(prompt_lower):
+                if keyword in seen:
+                    continue
+                seen.add(keyword)
+                for intent in intents:
+                    scores[intent] += 1
+            
+            return scores
+        
+        # Regex fallback
+        for longest in self._PATTERN.findall(prompt_lower):
+            for keyword in self._PREFIXES[longest]:
+                if keyword in seen:
+                    continue
+                seen.add(keyword)
+                for intent in self._KEYWORD_INTENTS[keyword]:
+                    scores[intent] += 1
         
-        # Store score for each intent
-        scores: Dict[str, int] = {}
+        return scores
+    
+    # Detect intent and its confidence with a single scan of the prompt
+    def detect_with_confidence(self, prompt: str) -> Tuple[str, float]:
+        
+        # Convert text to lowercase once for easy matching
+        prompt_lower = prompt.lower()
         
-        # Check how many keywords match for each intent
-        for intent, keywords in self.INTENT_KEYWORDS.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in prompt_lower:
-                    score += 1
-            scores[intent] = score
+        # Count matching keywords for each intent in one pass
+        scores = self._scan(prompt_lower)
         
-        # Get highest scoring intent
-        max_score = max(scores.values())
+        # Find highest scoring intent in a single pass
+        # (ties go to the intent defined first in INTENT_KEYWORDS)
+        best_index, best_score = 0, 0
+        for index, score in enumerate(scores):
+            if score > best_score:
+                best_index, best_score = index, score
         
-        if max_score == 0:
-            return "general"
+        # No keyword matched, general intent has medium confidence
+        if not best_score:
+            return "general", 0.5
         
-        # Return intent with highest score
-        for intent, score in scores.items():
-            if score == max_score:
-                return intent
+        # Confidence = matched keywords / total keywords (max 1.0)
+        return (
+            self._INTENT_NAMES[best_index],
+            min(best_score / self._KEYWORD_COUNTS[best_index], 1.0)
+        )
+    
+    # This function checks the prompt and decides intent
+    def detect(self, prompt: str) -> str:
         
-        return "general"
+        return self.detect_with_confidence(prompt)[0]
     
     # This function tells how confident we are about detected intent
     def get_confidence(self, prompt: str, intent: str) -> float:
        
-        prompt_lower = prompt.lower()
-        
         # General intent has medium confidence
         if intent == "general":
             return 0.5
         
-        keywords = self.INTENT_KEYWORDS.get(intent, [])
-        # Count matching keywords
-        matches = sum(1 for kw in keywords if kw in prompt_lower)
-        
-        if not keywords:
+        # Unknown intent has no keywords
+        index = self._INTENT_INDEX.get(intent)
+        if index is None:
             return 0.0
         
+        total = self._KEYWORD_COUNTS[index]
+        
+        # Count matching keywords using the same scan as detect()
+        matches = self._scan(prompt.lower())[index]
+        
         # Confidence = matched keywords / total keywords (max 1.0)
-        return min(matches / len(keywords), 1.0)
+        return min(matches / total, 1.0)
+
+# Intent enum at module level (intents.detector.Intent)
+Intent = IntentDetector.Intent
 
 # Create one global detector object
 detector = IntentDetector()
@@ -92,6 +214,11 @@ def detect_intent(prompt: str) -> str:
     
     return detector.detect(prompt)
 
+# Same as detect_intent(), but also returns the confidence score
+def detect_intent_with_confidence(prompt: str) -> Tuple[str, float]:
+    
+    return detector.detect_with_confidence(prompt)
+
 
 
 
@@ -3,13 +3,15 @@
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, Dict, Any, List
+from logging.handlers import QueueHandler, QueueListener
+import logging
+import queue
 import time
 
 # Import provider setup and custom error types
-from providers import initialize_providers, get_provider, ProviderError, RateLimitError, TimeoutError
-from intents.detector import detect_intent
+from providers import initialize_providers, get_provider, close_providers, PROVIDERS, ProviderError, RateLimitError, TimeoutError
 from router.router import router
 from tracking.usage import tracker
 from tracking.cooldown import cooldown_manager
@@ -22,6 +24,18 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Request logger
+# Records go into a queue and a background thread writes them out,
+# so request handlers never block on terminal I/O
+# The queue handler is only attached while the listener runs (startup to
+# shutdown), so records never pile up in a queue nobody drains
+logger = logging.getLogger("orch")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_queue = queue.Queue(-1)
+_log_handler = QueueHandler(_log_queue)
+_log_listener = QueueListener(_log_queue, logging.StreamHandler())
+
 # Allow requests from any frontend (React, Streamlit, etc.)
 app.add_middleware(
     CORSMiddleware,
@@ -34,6 +48,9 @@ app.add_middleware(
 # This runs automatically when the server starts
 @app.on_event("startup")
 async def startup_event():
+    # Start background log writer and send request logs to it
+    _log_listener.start()
+    logger.addHandler(_log_handler)
     # Print startup message
     print("\n" + "="*60)
     print("🚀 Starting LLM Orchestration Layer")
@@ -42,8 +59,20 @@ async def startup_event():
     initialize_providers()
     print("="*60 + "\n")
 
+# This runs automatically when the server stops
+@app.on_event("shutdown")
+async def shutdown_event():
+    # Close shared provider HTTP connections
+    await close_providers()
+    # Stop queueing log records, then flush the rest and stop the writer thread
+    logger.removeHandler(_log_handler)
+    _log_listener.stop()
+
 # Request Model (input format)
+# Strict: values must already have the right JSON type (no coercion)
 class GenerateRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True, strict=True)
+    
     prompt: str = Field(..., description="User prompt text", min_length=1)
     preference: Optional[str] = Field(
         "balanced",
@@ -53,7 +82,11 @@ class GenerateRequest(BaseModel):
     temperature: Optional[float] = Field(0.7, description="Temperature (0.0 - 1.0)")
 
 # Response Model (output format)
+# Response models are built by our own code from trusted data,
+# so endpoints create them with model_construct() (no validation)
 class GenerateResponse(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
     text: str
     model_used: str
     provider: str
@@ -65,6 +98,8 @@ class GenerateResponse(BaseModel):
 
 # Model usage statistics structure
 class UsageStats(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
     model: str
     total_tokens: int
     last_hour_tokens: int
@@ -73,10 +108,26 @@ class UsageStats(BaseModel):
 
 # Full system stats structure
 class SystemStats(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
     total_requests: int
     models: List[UsageStats]
     active_cooldowns: Dict[str, int]
 
+# Health check structure
+class HealthStatus(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
+    status: str
+    timestamp: float
+    providers_available: int
+
+# Reset result structure
+class ResetResult(BaseModel):
+    model_config = ConfigDict(extra="forbid", frozen=True)
+    
+    message: str
+
 # Main LLM generation endpoint
 @app.post("/generate", response_model=GenerateResponse)
 async def generate(request: GenerateRequest):
@@ -92,39 +143,30 @@ async def generate(request: GenerateRequest):
     # Record start time to measure latency
     start_time = time.time()
     
-    # Step 1: Understand user intent
-    intent = detect_intent(request.prompt)
-    print(f"📋 Intent detected: {intent}")
-    
-    # Step 2: Choose best model based on intent + preference
-    selection = router.select_model(intent, preference=request.preference)
+    # Step 1: Understand user intent (and how sure we are)
+    # Step 2: Get models to try, best model (intent + preference) first,
+    # followed by backup models
+    # Both happen in one router call
+    intent, intent_confidence, all_attempts = router.route_prompt(request.prompt, request.preference)
+    logger.info("📋 Intent detected: %s (confidence %.2f)", intent, intent_confidence)
     
     # If no model is available (all in cooldown)
-    if not selection:
+    if not all_attempts:
         raise HTTPException(
             status_code=503,
             detail="No models available - all are on cooldown"
         )
     
-    provider_name, model_name = selection
-    print(f"🎯 Selected: {provider_name}/{model_name}")
-    
-    # Step 3: Variables to track fallback behavior
-    fallback_used = False
-    fallback_reason = None
-    tried_models = []
-    
-    # Get list of backup models
-    fallback_chain = router.get_fallback_chain(intent, model_name)
-    all_attempts = [(provider_name, model_name)] + fallback_chain
+    provider_name, model_name, _ = all_attempts[0]
+    logger.info("🎯 Selected: %s/%s", provider_name, model_name)
     
+    # Step 3: Try each model in order, remember the last failure
     last_error = None
     
-    for attempt_provider, attempt_model in all_attempts:
-        tried_models.append(attempt_model)
+    for attempt_index, (attempt_provider, attempt_model, wire_model) in enumerate(all_attempts):
         
         try:
-            print(f"🔄 Trying: {attempt_provider}/{attempt_model}")
+            logger.info("🔄 Trying: %s/%s", attempt_provider, attempt_model)
             
             # Get provider
             provider = get_provider(attempt_provider)
@@ -132,37 +174,34 @@ async def generate(request: GenerateRequest):
             # Ask model to generate response
             result = await provider.generate(
                 prompt=request.prompt,
-                model=attempt_model,
+                model=wire_model,
                 max_tokens=request.max_tokens,
                 temperature=request.temperature
             )
             
-            # Step 4: Record token usage
-            tracker.record_usage(
+            # Step 4: Record token usage and check cooldown threshold
+            cooldown_triggered = cooldown_manager.record_and_check(
                 model=attempt_model,
                 tokens=result["tokens"],
-                provider=attempt_provider
-            )
-            
-            # Check cooldown threshold
-            cooldown_triggered = cooldown_manager.check_and_trigger_cooldown(
-                model=attempt_model,
+                provider=attempt_provider,
                 window_seconds=3600  # 1 hour window
             )
             
             if cooldown_triggered:
-                print(f"❄️  Cooldown triggered for {attempt_model}")
+                logger.info("❄️  Cooldown triggered for %s", attempt_model)
             
-            # If fallback model was used
-            if attempt_model != model_name:
-                fallback_used = True
+            # If fallback model was used, explain why
+            # (the error is only turned into text here, once, when it is reported)
+            fallback_used = attempt_index > 0
+            fallback_reason = None
+            if fallback_used and last_error is not None:
                 fallback_reason = f"Primary model failed: {str(last_error)[:100]}"
             
             # Calculate total latency
             total_latency = time.time() - start_time
             
             # Step 5: Return response
-            return GenerateResponse(
+            return GenerateResponse.model_construct(
                 text=result["text"],
                 model_used=attempt_model,
                 provider=attempt_provider,
@@ -171,7 +210,8 @@ async def generate(request: GenerateRequest):
                 metadata={
                     **result["metadata"],
                     "total_latency_seconds": round(total_latency, 2),
-                    "tried_models": tried_models,
+                    "intent_confidence": round(intent_confidence, 2),
+                    "tried_models": [m for _, m, _ in all_attempts[:attempt_index + 1]],
                     "cooldown_triggered": cooldown_triggered
                 },
                 fallback_used=fallback_used,
@@ -180,24 +220,24 @@ async def generate(request: GenerateRequest):
             
         except RateLimitError as e:
             last_error = e
-            print(f"⚠️  Rate limit hit on {attempt_model}: {e}")
+            logger.warning("⚠️  Rate limit hit on %s: %s", attempt_model, e)
             # Trigger immediate cooldown for rate-limited model
             cooldown_manager.trigger_cooldown(attempt_model, duration_seconds=600)
             continue
             
         except TimeoutError as e:
             last_error = e
-            print(f"⏱️  Timeout on {attempt_model}: {e}")
+            logger.warning("⏱️  Timeout on %s: %s", attempt_model, e)
             continue
             
         except ProviderError as e:
             last_error = e
-            print(f"❌ Provider error on {attempt_model}: {e}")
+            logger.warning("❌ Provider error on %s: %s", attempt_model, e)
             continue
             
         except Exception as e:
             last_error = e
-            print(f"💥 Unexpected error on {attempt_model}: {e}")
+            logger.error("💥 Unexpected error on %s: %s", attempt_model, e)
             continue
     
     # If all models failed
@@ -205,7 +245,7 @@ async def generate(request: GenerateRequest):
         status_code=500,
         detail={
             "error": "All models failed",
-            "tried_models": tried_models,
+            "tried_models": [m for _, m, _ in all_attempts],
             "last_error": str(last_error)
         }
     )
@@ -217,6 +257,9 @@ async def get_stats():
     
     all_usage = tracker.get_all_usage()
     
+    # Read the clock once for every model below
+    now = time.monotonic()
+    
     # Build stats for each model
     model_stats = []
     for model, total_tokens in all_usage.items():
@@ -224,42 +267,42 @@ async def get_stats():
         if model.startswith("provider:"):
             continue
         
-        model_stats.append(UsageStats(
+        model_stats.append(UsageStats.model_construct(
             model=model,
             total_tokens=total_tokens,
-            last_hour_tokens=tracker.get_usage_last_hour(model),
-            on_cooldown=cooldown_manager.is_on_cooldown(model),
-            cooldown_remaining_seconds=cooldown_manager.get_remaining_cooldown(model)
+            last_hour_tokens=tracker.get_usage_last_hour(model, now),
+            on_cooldown=cooldown_manager.is_on_cooldown(model, now),
+            cooldown_remaining_seconds=cooldown_manager.get_remaining_cooldown(model, now)
         ))
     
     # Get active cooldowns
     active_cooldowns = cooldown_manager.get_all_cooldowns()
     
-    return SystemStats(
+    return SystemStats.model_construct(
         total_requests=sum(all_usage.values()),
         models=model_stats,
         active_cooldowns=active_cooldowns
     )
 
 # Health check endpoint (used by monitoring tools)
-@app.get("/health")
+@app.get("/health", response_model=HealthStatus)
 async def health_check():
-    return {
-        "status": "healthy",
-        "timestamp": time.time(),
-        "providers_available": len(initialize_providers())
-    }
+    return HealthStatus.model_construct(
+        status="healthy",
+        timestamp=time.time(),
+        # Providers are created once at startup, just count them
+        providers_available=len(PROVIDERS)
+    )
 
 # Reset system (mainly for testing)
 
-@app.post("/reset")
+@app.post("/reset", response_model=ResetResult)
 async def reset_system():
     tracker.reset_usage()
     # Clear all cooldowns
-    for model in list(cooldown_manager._cooldowns.keys()):
-        cooldown_manager.clear_cooldown(model)
+    cooldown_manager.clear_all()
     
-    return {"message": "System reset successful"}
+    return ResetResult.model_construct(message="System reset successful")
 
 if __name__ == "__main__":
     import uvicorn
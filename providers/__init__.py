@@ -1,5 +1,10 @@
 #Provider initialization and registry
 
+from threading import Lock
+
+import httpx2
+
+from config import config
 from .base import BaseProvider, ProviderError, RateLimitError, TimeoutError, ErrorType
 from .openai_provider import OpenAIProvider
 from .anthropic_provider import AnthropicProvider
@@ -8,46 +13,97 @@ from .mock_provider import MockSuccessProvider, MockFailureProvider, MockRateLim
 # Provider registry
 PROVIDERS = {}
 
+# One HTTP connection pool shared by OpenAI and Anthropic clients
+# Reuses TCP/TLS connections and HTTP/2 streams across requests
+# (both SDKs are built on httpx2, so one httpx2.AsyncClient serves both)
+# Created by initialize_providers, closed by close_providers
+_http_client = None
+
+# Bound lookup on the registry, saves an attribute lookup per request
+# (PROVIDERS is only ever filled in place, never replaced)
+_get = PROVIDERS.get
+
+# Providers are created only once, later calls reuse the registry
+_init_lock = Lock()
+_initialized = False
+
 # Initialize and register all available providers
 def initialize_providers():
    
-    global PROVIDERS
-    
-    # Always register mock providers (used for testing)
-    PROVIDERS["mock_success"] = MockSuccessProvider()
-    PROVIDERS["mock_failure"] = MockFailureProvider()
-    PROVIDERS["mock_ratelimit"] = MockRateLimitProvider()
-    
-    # Try to initialize OpenAI provider
-    try:
-        PROVIDERS["openai"] = OpenAIProvider()
-        print("✓ OpenAI provider initialized")
-    except Exception as e:
-        print(f"⚠ OpenAI provider not available: {e}")
-    
-    # Try to initialize Anthropic provider
-    try:
-        anthropic = AnthropicProvider()
-        # Only add if client is properly created
-        if anthropic.client:
-            PROVIDERS["anthropic"] = anthropic
-            print("✓ Anthropic provider initialized")
-    except Exception as e:
-        print(f"⚠ Anthropic provider not available: {e}")
+    global _initialized, _http_client
+    
+    # Already done, nothing to create
+    if _initialized:
+        return PROVIDERS
+    
+    with _init_lock:
+        # Another thread may have finished while we waited
+        if _initialized:
+            return PROVIDERS
+        
+        # Always register mock providers (used for testing)
+        PROVIDERS["mock_success"] = MockSuccessProvider()
+        PROVIDERS["mock_failure"] = MockFailureProvider()
+        PROVIDERS["mock_ratelimit"] = MockRateLimitProvider()
+        
+        _http_client = httpx2.AsyncClient(
+            http2=True,
+            timeout=config.REQUEST_TIMEOUT_SECONDS,
+            limits=httpx2.Limits(max_connections=200, max_keepalive_connections=100)
+        )
+        
+        # Try to initialize OpenAI provider
+        try:
+            PROVIDERS["openai"] = OpenAIProvider(http_client=_http_client)
+            print("✓ OpenAI provider initialized")
+        except Exception as e:
+            print(f"⚠ OpenAI provider not available: {e}")
+        
+        # Try to initialize Anthropic provider
+        try:
+            anthropic = AnthropicProvider(http_client=_http_client)
+            # Only add if client is properly created
+            if anthropic.client:
+                PROVIDERS["anthropic"] = anthropic
+                print("✓ Anthropic provider initialized")
+        except Exception as e:
+            print(f"⚠ Anthropic provider not available: {e}")
+        
+        _initialized = True
     
     return PROVIDERS
 
 # Get provider instance by name
 def get_provider(provider_name: str) -> BaseProvider:
     
-    if not PROVIDERS:
+    provider = _get(provider_name)
+    if provider is not None:
+        return provider
+    
+    # Providers not set up yet (e.g. used outside the app startup)
+    if not _initialized:
         initialize_providers()
+        provider = _get(provider_name)
+        if provider is not None:
+            return provider
+    
+    # Provider does not exist
+    raise ValueError(f"Provider '{provider_name}' not found")
+
+# Close HTTP connections and empty the registry (called when the app shuts down)
+# The next initialize_providers() call creates providers and the pool again
+async def close_providers():
+    
+    global _initialized, _http_client
     
-    # Check if provider exists
-    if provider_name not in PROVIDERS:
-        raise ValueError(f"Provider '{provider_name}' not found")
+    with _init_lock:
+        client = _http_client
+        _http_client = None
+        PROVIDERS.clear()
+        _initialized = False
     
-    return PROVIDERS[provider_name]
+    if client is not None:
+        await client.aclose()
 
 # Exported symbols for this module
 __all__ = [
@@ -58,5 +114,6 @@ __all__ = [
     "ErrorType",
     "initialize_providers",
     "get_provider",
+    "close_providers",
     "PROVIDERS"
 ]
\ No newline at end of file
@@ -1,7 +1,8 @@
 #Anthropic Provider Implementation
 
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import httpx2
 from anthropic import AsyncAnthropic
 from anthropic import RateLimitError as AnthropicRateLimitError
 
@@ -11,14 +12,10 @@ from config import config
 # Anthropic provider class (Claude models)
 class AnthropicProvider(BaseProvider):
    
+    __slots__ = ("client",)
     
-    # Map simplified names to full model names
-    MODEL_MAPPING = {
-        "claude-sonnet-4": "claude-sonnet-4-20250514",
-        "claude-haiku-4": "claude-haiku-4-20250611"
-    }
-    
-    def __init__(self):
+    # http_client: shared connection pool (SDK creates its own if None)
+    def __init__(self, http_client: Optional[httpx2.AsyncClient] = None):
         super().__init__("anthropic")
         
         if not config.ANTHROPIC_API_KEY:
@@ -27,10 +24,12 @@ class AnthropicProvider(BaseProvider):
         else:
             self.client = AsyncAnthropic(
                 api_key=config.ANTHROPIC_API_KEY,
-                timeout=config.REQUEST_TIMEOUT_SECONDS
+                timeout=config.REQUEST_TIMEOUT_SECONDS,
+                http_client=http_client
             )
     
     # Generate response from Anthropic model
+    # model must be the full model id (see config.WIRE_MODEL_IDS)
     async def generate(self, prompt: str, model: str, **kwargs) -> Dict[str, Any]:
         
         if not self.client:
@@ -39,13 +38,10 @@ class AnthropicProvider(BaseProvider):
         # Record start time to calculate latency
         start_time = time.time()
         
-        # Convert short model name to full model name
-        full_model_name = self.MODEL_MAPPING.get(model, model)
-        
         try:
             # Send prompt to Anthropic Messages API
             response = await self.client.messages.create(
-                model=full_model_name,
+                model=model,
                 max_tokens=kwargs.get("max_tokens", 1000),
                 messages=[
                     {"role": "user", "content": prompt}
@@ -67,19 +63,18 @@ class AnthropicProvider(BaseProvider):
     # Convert Anthropic response into common response format
     def normalize_response(self, response: Any, model: str, latency: float) -> Dict[str, Any]:
         
-        # Anthropic returns content as a list
-        text_content = ""
-        for block in response.content:
-            if block.type == "text":
-                text_content = block.text
-                break
+        # Anthropic returns content as a list, use the first text block
+        text_content = next((b.text for b in response.content if b.type == "text"), "")
+        
+        usage = response.usage
+        input_tokens, output_tokens = usage.input_tokens, usage.output_tokens
         
         # Return standardized response
         return {
             "text": text_content,
-            "tokens": response.usage.input_tokens + response.usage.output_tokens,
-            "prompt_tokens": response.usage.input_tokens,
-            "completion_tokens": response.usage.output_tokens,
+            "tokens": input_tokens + output_tokens,
+            "prompt_tokens": input_tokens,
+            "completion_tokens": output_tokens,
             "model": model,
             "provider": self.provider_name,
             "metadata": {
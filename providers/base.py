@@ -33,9 +33,43 @@ class ErrorType(Enum):
     INVALID_REQUEST = "invalid_request"
     UNKNOWN = "unknown"
 
+# Known exception classes and their error category
+# Checked in order with isinstance, so subclasses must come before parents
+_ERROR_TABLE = [
+    (RateLimitError, ErrorType.RATE_LIMIT),
+    (TimeoutError, ErrorType.TIMEOUT),
+]
+
+# Add OpenAI SDK errors if the package is installed
+try:
+    import openai
+    _ERROR_TABLE += [
+        (openai.RateLimitError, ErrorType.RATE_LIMIT),
+        (openai.APITimeoutError, ErrorType.TIMEOUT),
+        (openai.BadRequestError, ErrorType.INVALID_REQUEST),
+    ]
+except ImportError:
+    pass
+
+# Add Anthropic SDK errors if the package is installed
+try:
+    import anthropic
+    _ERROR_TABLE += [
+        (anthropic.RateLimitError, ErrorType.RATE_LIMIT),
+        (anthropic.APITimeoutError, ErrorType.TIMEOUT),
+        (anthropic.BadRequestError, ErrorType.INVALID_REQUEST),
+    ]
+except ImportError:
+    pass
+
+_ERROR_TABLE = tuple(_ERROR_TABLE)
+
 # This is the parent class for all LLM providers (OpenAI, Groq, etc.)
 class BaseProvider(ABC):
     
+    # No per-instance __dict__, providers only hold a few fixed attributes
+    __slots__ = ("provider_name",)
+    
     def __init__(self, provider_name: str):
         # Store provider name (used for tracking & logging)
         self.provider_name = provider_name
@@ -54,6 +88,12 @@ class BaseProvider(ABC):
     # Convert provider-specific errors into standard error types
     def normalize_error(self, error: Exception) -> tuple[ErrorType, str]:
         
+        # Match on exception type first
+        for error_class, error_type in _ERROR_TABLE:
+            if isinstance(error, error_class):
+                return error_type, str(error)
+        
+        # Last resort: guess from the error message
         error_msg = str(error).lower()
         
         # Detect rate limit errors
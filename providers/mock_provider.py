@@ -6,9 +6,15 @@ from typing import Dict, Any
 
 from .base import BaseProvider, RateLimitError, TimeoutError, ProviderError
 
+# Response text templates (built once, filled per call)
+_SUCCESS_TEMPLATE = "[MOCK SUCCESS] Response to: {}..."
+_RATELIMIT_TEMPLATE = "[MOCK RATELIMIT] Call {}: {}..."
+
 # Mock provider that always returns a successful response
 class MockSuccessProvider(BaseProvider):
     
+    __slots__ = ()
+    
     def __init__(self):
         # Set provider name as mock_success
         super().__init__("mock_success")
@@ -21,11 +27,14 @@ class MockSuccessProvider(BaseProvider):
         
         tokens = random.randint(80, 150)
         
+        # Rough word count without building a list of words
+        prompt_tokens = (prompt.count(" ") + 1) * 2
+        
         return {
-            "text": f"[MOCK SUCCESS] Response to: {prompt[:50]}...",
+            "text": _SUCCESS_TEMPLATE.format(prompt[:50]),
             "tokens": tokens,
-            "prompt_tokens": len(prompt.split()) * 2,
-            "completion_tokens": tokens - (len(prompt.split()) * 2),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": tokens - prompt_tokens,
             "model": model,
             "provider": self.provider_name,
             "metadata": {
@@ -37,6 +46,8 @@ class MockSuccessProvider(BaseProvider):
 # Mock provider that always throws an error
 class MockFailureProvider(BaseProvider):
    
+    __slots__ = ()
+    
     def __init__(self):
         super().__init__("mock_failure")
     
@@ -49,6 +60,8 @@ class MockFailureProvider(BaseProvider):
 # Mock provider that simulates rate limit after few calls
 class MockRateLimitProvider(BaseProvider):
     
+    __slots__ = ("call_count",)
+    
     def __init__(self):
         super().__init__("mock_ratelimit")
         self.call_count = 0
@@ -64,7 +77,7 @@ class MockRateLimitProvider(BaseProvider):
         await asyncio.sleep(0.1)
         # Return fake response before rate limit hits
         return {
-            "text": f"[MOCK RATELIMIT] Call {self.call_count}: {prompt[:30]}...",
+            "text": _RATELIMIT_TEMPLATE.format(self.call_count, prompt[:30]),
             "tokens": 100,
             "prompt_tokens": 50,
             "completion_tokens": 50,
@@ -1,7 +1,8 @@
 #OpenAI Provider Implementation
 
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import httpx2
 from openai import AsyncOpenAI
 from openai import RateLimitError as OpenAIRateLimitError
 from openai import APITimeoutError as OpenAITimeoutError
@@ -12,7 +13,10 @@ from config import config
 # OpenAI provider class (extends BaseProvider)
 class OpenAIProvider(BaseProvider):
     
-    def __init__(self):
+    __slots__ = ("client",)
+    
+    # http_client: shared connection pool (SDK creates its own if None)
+    def __init__(self, http_client: Optional[httpx2.AsyncClient] = None):
         super().__init__("openai")
         
         if not config.OPENAI_API_KEY:
@@ -21,7 +25,8 @@ class OpenAIProvider(BaseProvider):
         # Create OpenAI async client
         self.client = AsyncOpenAI(
             api_key=config.OPENAI_API_KEY,
-            timeout=config.REQUEST_TIMEOUT_SECONDS
+            timeout=config.REQUEST_TIMEOUT_SECONDS,
+            http_client=http_client
         )
     
     # Generate response from OpenAI model
@@ -1,6 +1,29 @@
 # This file makes router tools easy to import from the router folder
 
 # Import main router class and helper items from router.py
-from .router import ModelRouter, router, get_models, MODEL_MAP
+from importlib import import_module
+import sys
+import warnings
 
-__all__ = ["ModelRouter", "router", "get_models", "MODEL_MAP"]
\ No newline at end of file
+from .router import ModelRouter, router
+
+__all__ = ["ModelRouter", "router"]
+
+# Old names (get_models, MODEL_MAP) still work but are deprecated
+def __getattr__(name):
+    
+    legacy = import_module(".router", __name__)._LEGACY.get(name)
+    if legacy is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value, replacement = legacy
+    # A from-import first checks the name with hasattr() (in importlib's
+    # _handle_fromlist), then fetches it. Only the fetch warns, so the
+    # warning is shown once and points at the importing line
+    if sys._getframe(1).f_code.co_name != "_handle_fromlist":
+        warnings.warn(
+            f"{__name__}.{name} is deprecated, use {replacement} instead",
+            DeprecationWarning,
+            stacklevel=2
+        )
+    return value
\ No newline at end of file
@@ -1,10 +1,27 @@
 #Intelligent model routing with fallback support
 
-from typing import List, Tuple, Optional, Dict
+import time
+import warnings
+from types import MappingProxyType
+from typing import Any, Callable, FrozenSet, Hashable, List, Mapping, Tuple, Optional, Dict
 from config import config
+from intents.detector import detector
 from tracking.cooldown import cooldown_manager
 from tracking.usage import tracker
 
+# Rank of each speed and quality level (lower sorts first)
+_SPEED_ORDER: Dict[str, int] = {"very_fast": 0, "fast": 1, "medium": 2, "slow": 3}
+_QUALITY_ORDER: Dict[str, int] = {"high": 0, "medium": 1, "low": 2}
+
+# Maximum number of cached routing decisions
+_CACHE_SIZE = 256
+
+# Shared empty exclusion set (most requests exclude nothing)
+_EMPTY: FrozenSet[str] = frozenset()
+
+# Shared (read-only) result of get_model_info() for unknown models
+_NO_MODEL_INFO: Mapping[str, Any] = MappingProxyType({})
+
 # This class decides which model should handle a request
 class ModelRouter:
     
@@ -14,9 +31,139 @@ class ModelRouter:
     def __init__(self):
         self.intent_routing = config.INTENT_ROUTING
         self.model_config = config.MODEL_CONFIG
+        self.wire_model_ids = config.WIRE_MODEL_IDS
         
         # Store fallback history (helps avoid repeating same failures)
         self._fallback_history: Dict[str, List[str]] = {}
+        
+        # Candidates for unknown intents
+        self._default: Tuple[str, ...] = ("gpt-3.5-turbo",)
+        
+        # Provider of each model, so building (provider, model) is one dict hit
+        self._provider_of: Dict[str, str] = {
+            model: cfg["provider"] for model, cfg in self.model_config.items()
+        }
+        
+        # Numeric sort key of every model for each sorting preference:
+        # {preference: {model: score}}, lower scores come first
+        self._model_score: Dict[str, Dict[str, float]] = {
+            preference: {
+                model: self._numeric_score(cfg, preference)
+                for model, cfg in self.model_config.items()
+            }
+            for preference in ("cost", "speed", "quality")
+        }
+        
+        # Ordered candidates per preference and intent:
+        # {preference: {intent: (model, ...)}}
+        # Built once, since INTENT_ROUTING and MODEL_CONFIG never change
+        self._ordered: Dict[str, Dict[str, Tuple[str, ...]]] = self._build_ordered()
+        
+        # Cached routing decisions: {key: (cooldown generation, result)}
+        # An entry from an older generation is stale (some model entered or
+        # left cooldown since) and is replaced the next time its key is used
+        # Oldest keys are evicted first once the cache is full
+        self._cache: Dict[Tuple[Hashable, ...], Tuple[int, Any]] = {}
+        
+        # Intent detection used by route_prompt (bound once)
+        self._detect = detector.detect_with_confidence
+    
+    # Return the routing decision stored under key for this cooldown generation,
+    # computing and saving it first when missing or stale
+    def _cached(self, key: Tuple[Hashable, ...], generation: int, compute: Callable[[], Any]) -> Any:
+        
+        cache = self._cache
+        entry = cache.get(key)
+        if entry is not None and entry[0] == generation:
+            return entry[1]
+        
+        # compute may store entries of its own, so make room afterwards
+        result = compute()
+        if key not in cache and len(cache) >= _CACHE_SIZE:
+            # Drop the oldest key (dicts keep insertion order)
+            cache.pop(next(iter(cache), None), None)
+        
+        cache[key] = (generation, result)
+        return result
+    
+    # Cached versions of the routing methods below
+    # Each returns the stored result when it belongs to the current generation
+    # Unknown preferences are keyed as "balanced" (the order they route by),
+    # so arbitrary preference strings can't fill the cache and evict real entries
+    def _select_cached(
+        self,
+        intent: str,
+        preference: str,
+        excluded_models: FrozenSet[str],
+        generation: int
+    ) -> Optional[Tuple[str, str]]:
+        
+        if preference not in self._ordered:
+            preference = "balanced"
+        
+        return self._cached(
+            ("select", intent, preference, excluded_models),
+            generation,
+            lambda: self._select_model(intent, preference, excluded_models)
+        )
+    
+    def _fallback_cached(
+        self,
+        intent: str,
+        failed_model: str,
+        max_fallbacks: int,
+        generation: int
+    ) -> Tuple[Tuple[str, str], ...]:
+        
+        return self._cached(
+            ("fallback", intent, failed_model, max_fallbacks),
+            generation,
+            lambda: self._get_fallback_chain(intent, failed_model, max_fallbacks)
+        )
+    
+    def _attempts_cached(
+        self,
+        intent: str,
+        preference: str,
+        generation: int
+    ) -> Tuple[Tuple[str, str, str], ...]:
+        
+        if preference not in self._ordered:
+            preference = "balanced"
+        
+        return self._cached(
+            ("attempts", intent, preference),
+            generation,
+            lambda: self._get_attempt_chain(intent, preference, generation)
+        )
+    
+    # Sort score of a model for a preference (unknown levels go last)
+    @staticmethod
+    def _numeric_score(cfg: Dict, preference: str) -> float:
+        
+        if preference == "cost":
+            return cfg["cost_per_1k"]
+        if preference == "speed":
+            return _SPEED_ORDER.get(cfg["speed"], 99)
+        return _QUALITY_ORDER.get(cfg["quality"], 99)
+    
+    # Precompute ordered candidates for every preference and intent
+    def _build_ordered(self) -> Dict[str, Dict[str, Tuple[str, ...]]]:
+        
+        return {
+            preference: {
+                intent: self._order_models(models, preference)
+                for intent, models in self.intent_routing.items()
+            }
+            for preference in ("balanced", "cost", "speed", "quality")
+        }
+    
+    # Get ordered candidate models for an intent and preference
+    # Unknown preferences use the balanced order, unknown intents the default model
+    def _ordered_candidates(self, intent: str, preference: str) -> Tuple[str, ...]:
+        
+        ordered = self._ordered.get(preference) or self._ordered["balanced"]
+        return ordered.get(intent, self._default)
     
     # Choose the best model for a request
     def select_model(
@@ -26,57 +173,55 @@ class ModelRouter:
         excluded_models: Optional[List[str]] = None
     ) -> Optional[Tuple[str, str]]:
         
-        # Get candidate models for this intent
-        candidate_models = self.intent_routing.get(intent, ["gpt-3.5-turbo"])
+        # A set, so membership is one hash lookup and the cache key
+        # does not depend on the order models were listed in
+        excluded = frozenset(excluded_models) if excluded_models else _EMPTY
+        
+        # One clock read per routing call
+        now = time.monotonic()
+        return self._select_cached(intent, preference, excluded, cooldown_manager.generation(now))
+    
+    def _select_model(
+        self,
+        intent: str,
+        preference: str,
+        excluded_models: FrozenSet[str]
+    ) -> Optional[Tuple[str, str]]:
         
-        # Remove models that should not be used
-        if excluded_models:
-            candidate_models = [
-                m for m in candidate_models 
-                if m not in excluded_models
-            ]
+        # Get candidate models for this intent, already sorted by preference
+        candidate_models = self._ordered_candidates(intent, preference)
         
-        # Remove models that are in cooldown
-        available_models = [
-            model for model in candidate_models
-            if not cooldown_manager.is_on_cooldown(model)
-        ]
+        # Select first model that is not excluded and not in cooldown
+        # Both filters run in the same single pass, which stops at the
+        # first match without building filtered lists
+        blocked = cooldown_manager.snapshot_active()
+        selected_model = next(
+            (
+                model for model in candidate_models
+                if model not in blocked and model not in excluded_models
+            ),
+            None
+        )
         
         # If no models are available
-        if not available_models:
+        if selected_model is None:
             return None
         
-        # Sort models based on user preference
-        if preference == "cost":
-            # Lowest cost first
-            available_models.sort(
-                key=lambda m: self.model_config[m]["cost_per_1k"]
-            )
-        elif preference == "speed":
-            # Fastest first
-            speed_order = {"very_fast": 0, "fast": 1, "medium": 2, "slow": 3}
-            available_models.sort(
-                key=lambda m: speed_order.get(
-                    self.model_config[m]["speed"], 99
-                )
-            )
-        elif preference == "quality":
-            # Highest quality first
-            quality_order = {"high": 0, "medium": 1, "low": 2}
-            available_models.sort(
-                key=lambda m: quality_order.get(
-                    self.model_config[m]["quality"], 99
-                )
-            )
-        else:  # balanced
-            # Use the order defined in INTENT_ROUTING
-            pass
-        
-        # Select first available model
-        selected_model = available_models[0]
-        provider = self.model_config[selected_model]["provider"]
-        
-        return (provider, selected_model)
+        return (self._provider_of[selected_model], selected_model)
+    
+    # Sort models based on user preference
+    def _order_models(self, models: Tuple[str, ...], preference: str) -> Tuple[str, ...]:
+        
+        available_models = list(models)
+        
+        # Lowest cost / fastest / highest quality first
+        # Keys are plain numbers looked up through a bound dict method
+        scores = self._model_score.get(preference)
+        if scores is not None:
+            available_models.sort(key=scores.__getitem__)
+        # balanced: use the order defined in INTENT_ROUTING
+        
+        return tuple(available_models)
     
     # Get backup models if primary model fails
     def get_fallback_chain(
@@ -84,35 +229,92 @@ class ModelRouter:
         intent: str, 
         failed_model: str,
         max_fallbacks: int = 3
-    ) -> List[Tuple[str, str]]:
+    ) -> Tuple[Tuple[str, str], ...]:
+        
+        now = time.monotonic()
+        return self._fallback_cached(intent, failed_model, max_fallbacks, cooldown_manager.generation(now))
+    
+    def _get_fallback_chain(
+        self,
+        intent: str,
+        failed_model: str,
+        max_fallbacks: int
+    ) -> Tuple[Tuple[str, str], ...]:
        
-        # Get all candidate models
-        candidate_models = self.intent_routing.get(intent, ["gpt-3.5-turbo"])
+        # Get all candidate models (in INTENT_ROUTING order)
+        candidate_models = self._ordered["balanced"].get(intent, self._default)
+        provider_of = self._provider_of
         
-        # Remove the model that already failed
-        fallback_models = [m for m in candidate_models if m != failed_model]
+        # Nothing in cooldown, only the failed model has to be skipped
+        blocked = cooldown_manager.snapshot_active()
+        if not blocked:
+            return tuple([
+                (provider_of[model], model)
+                for model in candidate_models
+                if model != failed_model
+            ][:max_fallbacks])
         
-        # Remove models that are in cooldown
-        fallback_models = [
-            m for m in fallback_models
-            if not cooldown_manager.is_on_cooldown(m)
-        ]
+        # Skip the failed model and models in cooldown, in one pass,
+        # then limit number of fallback attempts
+        return tuple([
+            (provider_of[model], model)
+            for model in candidate_models
+            if model != failed_model and model not in blocked
+        ][:max_fallbacks])
+    
+    # Get every model to try for a request
+    # The selected model comes first, followed by its fallback chain
+    # Each entry is (provider, model name, wire-level model id)
+    def get_attempt_chain(
+        self,
+        intent: str,
+        preference: str = "balanced"
+    ) -> Tuple[Tuple[str, str, str], ...]:
         
-        # Limit number of fallback attempts
-        fallback_models = fallback_models[:max_fallbacks]
+        now = time.monotonic()
+        return self._attempts_cached(intent, preference, cooldown_manager.generation(now))
+    
+    def _get_attempt_chain(
+        self,
+        intent: str,
+        preference: str,
+        generation: int
+    ) -> Tuple[Tuple[str, str, str], ...]:
         
-        # Convert model names into (provider, model) pairs
-        result = []
-        for model in fallback_models:
-            provider = self.model_config[model]["provider"]
-            result.append((provider, model))
+        selection = self._select_cached(intent, preference, _EMPTY, generation)
         
-        return result
+        # No model available (all in cooldown)
+        if not selection:
+            return ()
+        
+        attempts = (selection,) + self._fallback_cached(intent, selection[1], 3, generation)
+        return tuple(
+            (provider, model, self.wire_model_ids.get(model, model))
+            for provider, model in attempts
+        )
+    
+    # Detect the intent of a prompt and get its attempt chain in one call
+    # Returns (intent, confidence, attempts), attempts as in get_attempt_chain()
+    # Intent detection is a single keyword sweep (C-level Aho-Corasick
+    # automaton when pyahocorasick is installed), routing is a cache hit
+    # on the precomputed candidate orders
+    def route_prompt(
+        self,
+        prompt: str,
+        preference: str = "balanced"
+    ) -> Tuple[str, float, Tuple[Tuple[str, str, str], ...]]:
+        
+        intent, confidence = self._detect(prompt)
+        
+        now = time.monotonic()
+        attempts = self._attempts_cached(intent, preference, cooldown_manager.generation(now))
+        return intent, confidence, attempts
     
     # Get full configuration of a model
-    def get_model_info(self, model: str) -> Dict:
+    # (read-only, like the entries of config.MODEL_CONFIG)
+    def get_model_info(self, model: str) -> Mapping[str, Any]:
         
-        return self.model_config.get(model, {})
+        return self.model_config.get(model, _NO_MODEL_INFO)
     
     # Check if a model is available
     def is_model_available(self, model: str) -> bool:
@@ -122,13 +324,30 @@ class ModelRouter:
 # Create one global router object
 router = ModelRouter()
 
-# Backward compatibility
-MODEL_MAP = config.INTENT_ROUTING
-
-# Old function (kept for compatibility)
-def get_models(intent: str) -> List[str]:
+# Old function (kept for compatibility, deprecated)
+def _legacy_get_models(intent: str) -> Tuple[str, ...]:
     """Legacy function"""
-    return MODEL_MAP.get(intent, ["gpt-3.5-turbo"])
+    return config.INTENT_ROUTING.get(intent, router._default)
 
+# Backward compatibility: {old name: (object, what to use instead)}
+_LEGACY = {
+    "MODEL_MAP": (config.INTENT_ROUTING, "config.INTENT_ROUTING"),
+    "get_models": (_legacy_get_models, "router.select_model()")
+}
+
+# Old names are only looked up when used, and warn that they are deprecated
+def __getattr__(name):
+    
+    legacy = _LEGACY.get(name)
+    if legacy is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value, replacement = legacy
+    warnings.warn(
+        f"{__name__}.{name} is deprecated, use {replacement} instead",
+        DeprecationWarning,
+        stacklevel=2
+    )
+    return value
 
 
@@ -1,8 +1,14 @@
 # basic system tests using pytest
+import asyncio
+import dataclasses
+import warnings
 import pytest
-from intents.detector import detect_intent
-from router.router import router
-from tracking.usage import tracker
+import providers
+from providers import anthropic_provider, openai_provider
+from config import config
+from intents.detector import Intent, IntentDetector, detect_intent, detector, _build_pattern, _build_prefixes
+from router.router import ModelRouter, router
+from tracking.usage import TokenTracker, tracker, _SHARD_MASK
 from tracking.cooldown import cooldown_manager
 
 # test if intent detection works correctly
@@ -39,4 +45,256 @@ def test_cooldown():
     assert not cooldown_manager.is_on_cooldown("test-model")
     
     cooldown_manager.trigger_cooldown("test-model", duration_seconds=5)
-    assert cooldown_manager.is_on_cooldown("test-model")
\ No newline at end of file
+    assert cooldown_manager.is_on_cooldown("test-model")
+
+# test intent and confidence are detected together
+def test_intent_with_confidence():
+    
+    assert detector.detect_with_confidence("hello there") == ("general", 0.5)
+    
+    intent, confidence = detector.detect_with_confidence("write me some Python code")
+    assert intent == "code_generation"
+    assert confidence == detector.get_confidence("write me some Python code", intent)
+
+# test cached routing reacts to cooldown changes
+def test_routing_follows_cooldown():
+    
+    cooldown_manager.clear_cooldown("gpt-4")
+    assert router.select_model("code_generation") == ("openai", "gpt-4")
+    
+    cooldown_manager.trigger_cooldown("gpt-4", duration_seconds=5)
+    assert router.select_model("code_generation") == ("openai", "gpt-3.5-turbo")
+    
+    cooldown_manager.clear_cooldown("gpt-4")
+    assert router.select_model("code_generation") == ("openai", "gpt-4")
+
+# test the regex fallback (used without pyahocorasick) scores like the automaton
+@pytest.mark.skipif(detector._AUTOMATON is None, reason="pyahocorasick not installed")
+def test_regex_fallback_matches_automaton():
+    
+    keywords = list(IntentDetector._KEYWORD_INTENTS)
+    
+    class RegexDetector(IntentDetector):
+        _AUTOMATON = None
+        _PATTERN = _build_pattern(keywords)
+        _PREFIXES = _build_prefixes(keywords)
+    
+    regex_detector = RegexDetector()
+    
+    # Overlapping keywords: java/javascript, write/write code, translate/translation
+    prompts = [
+        "write javascript code in java",
+        "please write code, then write a blog post",
+        "translate this, the translation must convert to french",
+        "summarize the summary, key points only, tldr",
+        "what is a class? how does a function work? explain",
+        "javascript",
+        "write code",
+        "javascriptjava writecode",
+        "nothing to see here",
+        ""
+    ]
+    for prompt in prompts:
+        prompt_lower = prompt.lower()
+        assert regex_detector._scan(prompt_lower) == detector._scan(prompt_lower), prompt
+
+# test Intent enum follows the keyword table order (scores are indexed by it)
+def test_intent_enum_order():
+    
+    assert [i.name.lower() for i in Intent] == list(IntentDetector.INTENT_KEYWORDS)
+
+# test clearing every cooldown at once
+def test_clear_all_cooldowns():
+    
+    cooldown_manager.trigger_cooldown("test-model-a", duration_seconds=5)
+    cooldown_manager.trigger_cooldown("test-model-b", duration_seconds=5)
+    
+    cooldown_manager.clear_all()
+    assert not cooldown_manager.is_on_cooldown("test-model-a")
+    assert not cooldown_manager.is_on_cooldown("test-model-b")
+    assert cooldown_manager.get_all_cooldowns() == {}
+
+# test OpenAI and Anthropic register when keys are set, also after a restart
+def test_sdk_providers_register(monkeypatch):
+    
+    test_config = dataclasses.replace(config, OPENAI_API_KEY="test-key", ANTHROPIC_API_KEY="test-key")
+    for module in (providers, openai_provider, anthropic_provider):
+        monkeypatch.setattr(module, "config", test_config)
+    
+    try:
+        for _ in range(2):
+            asyncio.run(providers.close_providers())
+            providers.initialize_providers()
+            
+            assert "openai" in providers.PROVIDERS
+            assert "anthropic" in providers.PROVIDERS
+            assert not providers.PROVIDERS["openai"].client._client.is_closed
+            assert not providers.PROVIDERS["anthropic"].client._client.is_closed
+            assert providers.PROVIDERS["openai"].client._client is providers.PROVIDERS["anthropic"].client._client
+    finally:
+        asyncio.run(providers.close_providers())
+
+# test recording usage and checking the cooldown threshold in one call
+def test_record_and_check():
+    
+    tracker.reset_usage("test-model-c")
+    cooldown_manager.clear_cooldown("test-model-c")
+    
+    assert not cooldown_manager.record_and_check("test-model-c", 10)
+    assert tracker.get_total_usage("test-model-c") == 10
+    
+    assert cooldown_manager.record_and_check("test-model-c", cooldown_manager.threshold)
+    assert cooldown_manager.is_on_cooldown("test-model-c")
+    cooldown_manager.clear_cooldown("test-model-c")
+
+# usage log of one model inside a tracker (for checking its internals)
+def _usage_log(usage_tracker, model):
+    
+    return usage_tracker._usage_shards[hash(model) & _SHARD_MASK][model]
+
+# test entries leaving the minute and hour windows (explicit times)
+def test_usage_windows_expire():
+    
+    usage_tracker = TokenTracker()
+    usage_tracker.record_usage("m", 10, now=1000.0)
+    usage_tracker.record_usage("m", 5, now=1050.0)
+    
+    assert usage_tracker.get_usage_in_window("m", 60, now=1059.0) == 15
+    assert usage_tracker.get_usage_in_window("m", 60, now=1061.0) == 5
+    assert usage_tracker.get_usage_in_window("m", 60, now=1111.0) == 0
+    
+    assert usage_tracker.get_usage_in_window("m", 3600, now=4599.0) == 15
+    assert usage_tracker.get_usage_in_window("m", 3600, now=4601.0) == 5
+    assert usage_tracker.get_usage_in_window("m", 3600, now=4651.0) == 0
+    assert usage_tracker.get_total_usage("m") == 15
+
+# test pruning old entries compacts the arrays and keeps window sums right
+def test_usage_prune_compacts():
+    
+    usage_tracker = TokenTracker()
+    for second in range(6):
+        usage_tracker.record_usage("m", 1, now=float(second))
+    for second in range(7000, 7004):
+        usage_tracker.record_usage("m", 10, now=float(second))
+    
+    # Retention is 2 hours, so the 6 oldest entries are dropped (more than half)
+    assert usage_tracker.get_usage_in_window("m", 3600, now=7300.0) == 40
+    log = _usage_log(usage_tracker, "m")
+    assert log.base == 6
+    assert len(log.timestamps) == 4
+    
+    assert usage_tracker.get_usage_in_window("m", 60, now=7300.0) == 0
+    usage_tracker.record_usage("m", 5, now=7310.0)
+    assert usage_tracker.get_usage_in_window("m", 60, now=7311.0) == 5
+    assert usage_tracker.get_usage_in_window("m", 3600, now=7311.0) == 45
+
+# test windows without a running sum (scanned)
+def test_usage_nonstandard_window():
+    
+    usage_tracker = TokenTracker()
+    usage_tracker.record_usage("m", 1, now=1000.0)
+    usage_tracker.record_usage("m", 2, now=1050.0)
+    usage_tracker.record_usage("m", 4, now=1090.0)
+    
+    assert usage_tracker.get_usage_in_window("m", 100, now=1120.0) == 6
+    assert usage_tracker.get_usage_in_window("m", 30, now=1120.0) == 4
+    assert usage_tracker.get_usage_in_window("m", 200, now=1120.0) == 7
+
+# test an entry recorded with an older time than the newest one
+# (it counts from the newest time, so windows never see entries out of order)
+def test_usage_out_of_order():
+    
+    usage_tracker = TokenTracker()
+    usage_tracker.record_usage("m", 5, now=100.0)
+    usage_tracker.record_usage("m", 7, now=50.0)
+    usage_tracker.record_usage("m", 1, now=120.0)
+    
+    assert usage_tracker.get_usage_in_window("m", 60, now=155.0) == 13
+    assert usage_tracker.get_usage_in_window("m", 100, now=155.0) == 13
+    assert usage_tracker.get_usage_in_window("m", 60, now=165.0) == 1
+    assert usage_tracker.get_usage_in_window("m", 30, now=165.0) == 0
+    assert usage_tracker.get_total_usage("m") == 13
+
+# test recording many usage entries in one call
+def test_record_usage_bulk():
+    
+    tracker.reset_usage("test-model-d")
+    tracker.reset_usage("test-model-e")
+    
+    tracker.record_usage_bulk([("test-model-d", 5), ("test-model-e", 7), ("test-model-d", 3)])
+    assert tracker.get_total_usage("test-model-d") == 8
+    assert tracker.get_total_usage("test-model-e") == 7
+    assert tracker.get_usage_last_minute("test-model-d") == 8
+
+# test the per-model entry limit drops the oldest entries (window sums undercount)
+def test_usage_max_events_trim():
+    
+    usage_tracker = TokenTracker(max_events_per_model=8)
+    for second in range(9):
+        usage_tracker.record_usage("m", 1, now=float(second))
+    
+    # Going past 8 entries trims down to 7 (an eighth of the limit at once)
+    log = _usage_log(usage_tracker, "m")
+    assert len(log.timestamps) - log.start == 7
+    assert usage_tracker.get_usage_in_window("m", 3600, now=9.0) == 7
+    assert usage_tracker.get_total_usage("m") == 9
+
+# test detecting intent and routing a prompt in one call
+def test_route_prompt():
+    
+    cooldown_manager.clear_all()
+    intent, confidence, attempts = router.route_prompt("explain how neural networks work")
+    
+    assert intent == "education"
+    assert confidence > 0
+    assert attempts == router.get_attempt_chain("education")
+
+# test unknown preferences share the balanced cache entries
+def test_unknown_preference_cache_key():
+    
+    cooldown_manager.clear_all()
+    model_router = ModelRouter()
+    balanced = model_router.get_attempt_chain("code_generation")
+    cached = len(model_router._cache)
+    
+    for number in range(300):
+        assert model_router.get_attempt_chain("code_generation", f"junk-{number}") == balanced
+        assert model_router.select_model("code_generation", f"junk-{number}") == balanced[0][:2]
+    
+    assert len(model_router._cache) == cached
+
+# test the minute and hour getters are plain methods (subclasses can override them)
+def test_usage_window_getters():
+    
+    usage_tracker = TokenTracker()
+    usage_tracker.record_usage("m", 3, now=1000.0)
+    usage_tracker.record_usage("m", 4, now=1100.0)
+    
+    assert usage_tracker.get_usage_last_minute("m", now=1130.0) == 4
+    assert usage_tracker.get_usage_last_hour("m", now=1130.0) == 7
+    assert "get_usage_last_hour" not in vars(usage_tracker)
+    
+    class FixedTracker(TokenTracker):
+        def get_usage_last_hour(self, model, now=None):
+            return 42
+    
+    assert FixedTracker().get_usage_last_hour("m") == 42
+
+# test legacy names still work and warn once per from-import, at the importing line
+def test_deprecated_shims():
+    
+    with pytest.deprecated_call():
+        from tracking import record_usage
+    with pytest.deprecated_call():
+        from router import get_models
+    
+    assert callable(record_usage)
+    assert get_models("unknown_intent") == router._default
+    
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        from tracking import get_usage
+        from router import MODEL_MAP
+    
+    assert [warning.category for warning in caught] == [DeprecationWarning] * 2
+    assert all(warning.filename == __file__ for warning in caught)
\ No newline at end of file
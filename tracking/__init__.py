@@ -1,17 +1,55 @@
 # This file makes tracking tools (usage + cooldown) easy to import
+# Names are loaded on first use (PEP 562), so importing the package does not
+# create the global tracker or cooldown manager until they are needed
 
-# Import token tracking tools
-from .usage import TokenTracker, tracker, record_usage, get_usage
-from .cooldown import CooldownManager, cooldown_manager, is_on_cooldown, set_cooldown
+from importlib import import_module
+import sys
+import warnings
+
+# Submodule that defines each exported name
+_EXPORTS = {
+    "TokenTracker": ".usage",
+    "tracker": ".usage",
+    "CooldownManager": ".cooldown",
+    "cooldown_manager": ".cooldown"
+}
+
+# Old names, still available but deprecated (not cached, so every use warns)
+_DEPRECATED = {
+    "record_usage": ".usage",
+    "get_usage": ".usage",
+    "is_on_cooldown": ".cooldown",
+    "set_cooldown": ".cooldown"
+}
 
 # Only these names will be accessible outside this module
-__all__ = [
-    "TokenTracker",
-    "tracker",
-    "record_usage",
-    "get_usage",
-    "CooldownManager",
-    "cooldown_manager",
-    "is_on_cooldown",
-    "set_cooldown"
-]
\ No newline at end of file
+__all__ = list(_EXPORTS)
+
+# Import the submodule on first access and cache the name in this module
+def __getattr__(name):
+    
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        module_name = _DEPRECATED.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+        
+        value, replacement = import_module(module_name, __name__)._LEGACY[name]
+        # A from-import first checks the name with hasattr() (in importlib's
+        # _handle_fromlist), then fetches it. Only the fetch warns, so the
+        # warning is shown once and points at the importing line
+        if sys._getframe(1).f_code.co_name != "_handle_fromlist":
+            warnings.warn(
+                f"{__name__}.{name} is deprecated, use {replacement} instead",
+                DeprecationWarning,
+                stacklevel=2
+            )
+        return value
+    
+    value = getattr(import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    
+    return sorted(set(globals()) | set(__all__))
\ No newline at end of file
@@ -2,9 +2,34 @@
 # Used to get current time
 
 import time
-from typing import Dict, Optional
+import warnings
+from typing import Dict, FrozenSet, Optional, Protocol
 from threading import Lock
-from .usage import tracker
+
+# Shared result for "no model in cooldown"
+_NO_COOLDOWNS: FrozenSet[str] = frozenset()
+
+# What the cooldown manager needs from a token tracker
+# TokenTracker matches this, tests can pass any object that does
+class TokenUsageSource(Protocol):
+    
+    def get_usage_in_window(
+        self,
+        model: str,
+        window_seconds: int = 3600,
+        now: Optional[float] = None
+    ) -> int: ...
+    
+    def get_usage_last_hour(self, model: str, now: Optional[float] = None) -> int: ...
+    
+    def record_and_get_usage(
+        self,
+        model: str,
+        tokens: int,
+        provider: Optional[str] = None,
+        window_seconds: int = 3600,
+        now: Optional[float] = None
+    ) -> int: ...
 
 # This class controls cooldown for models when they are overused
 class CooldownManager:
@@ -15,7 +40,7 @@ class CooldownManager:
     
     def __init__(
         self, 
-        token_tracker=None,
+        token_tracker: Optional[TokenUsageSource] = None,
         threshold: int = 5000,
         duration_seconds: int = 300
     ):
@@ -24,44 +49,102 @@ class CooldownManager:
         #threshold: Token threshold for triggering cooldown
         #duration_seconds: How long cooldown lasts (default: 5 minutes)
         
-        self.token_tracker = token_tracker or tracker
+        # The global tracker is looked up on first use (see token_tracker),
+        # so this module does not import tracking.usage when loaded
+        self._tracker_ref = token_tracker
         self.threshold = threshold
         self.duration_seconds = duration_seconds
         
         # Store cooldown expiry times: {model_name: expiry_timestamp}
+        # Methods below first check whether the dict is empty without taking
+        # the lock (a single read, atomic under the GIL), since most of the
+        # time no model is in cooldown. A cooldown started at the same moment
+        # is then seen by the next call, as if this one ran just before it
+        # Expiry times are time.monotonic() values, every method taking
+        # now expects the same clock
         self._cooldowns: Dict[str, float] = {}
         self._lock = Lock()
         
         # Statistics
         self._cooldown_count: Dict[str, int] = {}
+        
+        # Generation counter, bumped whenever the set of cooled-down models changes
+        # Lets callers (like the router) cache decisions until cooldowns change
+        self._generation = 0
+        # Earliest expiry among active cooldowns (used to notice expiries cheaply)
+        self._next_expiry = float("inf")
+    
+    # Token tracker used for usage checks (global tracker if none was given)
+    @property
+    def token_tracker(self) -> TokenUsageSource:
+        
+        if self._tracker_ref is None:
+            from .usage import tracker
+            self._tracker_ref = tracker
+        return self._tracker_ref
     
     # Check if a model is currently in cooldown
-    def is_on_cooldown(self, model: str) -> bool:
+    # now: time.monotonic() value already read by the caller (optional)
+    def is_on_cooldown(self, model: str, now: Optional[float] = None) -> bool:
+        
+        # No cooldowns at all, skip the lock
+        if not self._cooldowns:
+            return False
         
         with self._lock:
-            if model not in self._cooldowns:
+            expiry_time = self._cooldowns.get(model)
+            if expiry_time is None:
                 return False
             
-            expiry_time = self._cooldowns[model]
-            current_time = time.time()
+            current_time = time.monotonic() if now is None else now
             
             # Check if cooldown has expired
             if current_time >= expiry_time:
                 # Cooldown expired, remove it
                 del self._cooldowns[model]
+                self._generation += 1
                 return False
             
             return True
     
+    # Get all models on cooldown right now, as one snapshot
+    # Takes the lock once (instead of once per model) and drops expired entries
+    def snapshot_active(self, now: Optional[float] = None) -> FrozenSet[str]:
+        
+        if not self._cooldowns:
+            return _NO_COOLDOWNS
+        
+        with self._lock:
+            current_time = time.monotonic() if now is None else now
+            
+            expired = [
+                model for model, expiry_time in self._cooldowns.items()
+                if expiry_time <= current_time
+            ]
+            if expired:
+                for model in expired:
+                    del self._cooldowns[model]
+                self._next_expiry = min(self._cooldowns.values(), default=float("inf"))
+                self._generation += 1
+            
+            return frozenset(self._cooldowns)
+    
     # Manually put a model into cooldown
-    def trigger_cooldown(self, model: str, duration_seconds: Optional[int] = None):
+    def trigger_cooldown(
+        self,
+        model: str,
+        duration_seconds: Optional[int] = None,
+        now: Optional[float] = None
+    ):
         
         # Use custom duration or default
         duration = duration_seconds or self.duration_seconds
         
         with self._lock:
-            expiry_time = time.time() + duration
+            expiry_time = (time.monotonic() if now is None else now) + duration
             self._cooldowns[model] = expiry_time
+            self._generation += 1
+            self._next_expiry = min(self._next_expiry, expiry_time)
             
             # Increase cooldown counter for this model
             self._cooldown_count[model] = self._cooldown_count.get(model, 0) + 1
@@ -70,7 +153,11 @@ class CooldownManager:
     def check_and_trigger_cooldown(self, model: str, window_seconds: int = 3600) -> bool:
        
         # Get token usage in last window (like last hour)
-        usage = self.token_tracker.get_usage_in_window(model, window_seconds)
+        # The hourly window has its own specialized getter
+        if window_seconds == 3600:
+            usage = self.token_tracker.get_usage_last_hour(model)
+        else:
+            usage = self.token_tracker.get_usage_in_window(model, window_seconds)
         
         # If usage crossed threshold, start cooldown
         if usage >= self.threshold:
@@ -79,15 +166,40 @@ class CooldownManager:
         
         return False
     
+    # Record token usage and trigger cooldown if the threshold is crossed
+    # Usage is saved and counted under a single tracker lock
+    def record_and_check(
+        self,
+        model: str,
+        tokens: int,
+        provider: Optional[str] = None,
+        window_seconds: int = 3600
+    ) -> bool:
+        
+        # One clock read for both recording and the cooldown start
+        now = time.monotonic()
+        usage = self.token_tracker.record_and_get_usage(model, tokens, provider, window_seconds, now)
+        
+        # If usage crossed threshold, start cooldown
+        if usage >= self.threshold:
+            self.trigger_cooldown(model, now=now)
+            return True
+        
+        return False
+    
     # Get how many seconds are left in cooldown
-    def get_remaining_cooldown(self, model: str) -> int:
+    def get_remaining_cooldown(self, model: str, now: Optional[float] = None) -> int:
        
+        if not self._cooldowns:
+            return 0
+        
         with self._lock:
-            if model not in self._cooldowns:
+            expiry_time = self._cooldowns.get(model)
+            if expiry_time is None:
                 return 0
             
-            expiry_time = self._cooldowns[model]
-            remaining = int(expiry_time - time.time())
+            current_time = time.monotonic() if now is None else now
+            remaining = int(expiry_time - current_time)
             
             # Never return negative values
             return max(0, remaining)
@@ -96,13 +208,49 @@ class CooldownManager:
     def clear_cooldown(self, model: str):
         
         with self._lock:
-            self._cooldowns.pop(model, None)
+            if self._cooldowns.pop(model, None) is not None:
+                self._generation += 1
+    
+    # Remove cooldowns for all models at once
+    def clear_all(self):
+        
+        with self._lock:
+            if self._cooldowns:
+                self._cooldowns.clear()
+                self._generation += 1
+            self._next_expiry = float("inf")
+    
+    # Get current cooldown generation
+    # Expired cooldowns are removed first, so the value changes as soon as
+    # any model leaves cooldown
+    def generation(self, now: Optional[float] = None) -> int:
+        
+        # Nothing can expire, the generation stays as it is
+        if not self._cooldowns:
+            return self._generation
+        
+        with self._lock:
+            current_time = time.monotonic() if now is None else now
+            
+            if current_time >= self._next_expiry:
+                # Remove expired cooldowns
+                for model, expiry_time in list(self._cooldowns.items()):
+                    if current_time >= expiry_time:
+                        del self._cooldowns[model]
+                
+                self._next_expiry = min(self._cooldowns.values(), default=float("inf"))
+                self._generation += 1
+            
+            return self._generation
     
     # Get all models that are in cooldown right now
     def get_all_cooldowns(self) -> Dict[str, int]:
         
+        if not self._cooldowns:
+            return {}
+        
         with self._lock:
-            current_time = time.time()
+            current_time = time.monotonic()
             
             result = {}
             for model, expiry_time in self._cooldowns.items():
@@ -127,17 +275,38 @@ cooldown_manager = CooldownManager(
 
 # Backward compatibility functions
 # Old dictionary kept for compatibility (not used directly)
-cooldown = {}
+_legacy_cooldown: Dict[str, float] = {}
 
-# Old function name support
-def is_on_cooldown(model: str) -> bool:
+# Old function name support (deprecated)
+def _legacy_is_on_cooldown(model: str) -> bool:
     
     return cooldown_manager.is_on_cooldown(model)
 
-def set_cooldown(model: str, seconds: int = 60):
+def _legacy_set_cooldown(model: str, seconds: int = 60):
     
     cooldown_manager.trigger_cooldown(model, seconds)
 
+# Backward compatibility: {old name: (object, what to use instead)}
+_LEGACY = {
+    "cooldown": (_legacy_cooldown, "cooldown_manager"),
+    "is_on_cooldown": (_legacy_is_on_cooldown, "cooldown_manager.is_on_cooldown()"),
+    "set_cooldown": (_legacy_set_cooldown, "cooldown_manager.trigger_cooldown()")
+}
+
+# Old names are only looked up when used, and warn that they are deprecated
+def __getattr__(name):
+    
+    legacy = _LEGACY.get(name)
+    if legacy is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value, replacement = legacy
+    warnings.warn(
+        f"{__name__}.{name} is deprecated, use {replacement} instead",
+        DeprecationWarning,
+        stacklevel=2
+    )
+    return value
 
 
 
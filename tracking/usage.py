@@ -1,111 +1,409 @@
 #Token usage tracking with time-window support
 
+import sys
 import time
-from typing import Dict, List, Tuple
+import warnings
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from collections import defaultdict
+from contextlib import contextmanager
 # Lock makes this safe when many requests happen at same time
 from threading import Lock
 
+# Windows that keep a running token sum (last minute, last hour)
+# Other window sizes are answered by scanning the entries
+_STANDARD_WINDOWS: Tuple[int, ...] = (60, 3600)
+_WINDOW_SLOT: Dict[int, int] = {window: slot for slot, window in enumerate(_STANDARD_WINDOWS)}
+
+# Usage entries of one model, plus a running sum for each standard window
+# Timestamps and token counts are kept in two flat arrays (8 bytes each per
+# entry) instead of one tuple object per entry. Timestamps only grow, so
+# window boundaries are found with a binary search
+class _UsageLog:
+    
+    __slots__ = ("timestamps", "tokens", "start", "base", "added", "heads", "expired")
+    
+    def __init__(self):
+        # Oldest first, entry i is (timestamps[i], tokens[i])
+        self.timestamps = array("d")
+        self.tokens = array("q")
+        # Index of the oldest entry still kept (older ones were pruned)
+        self.start = 0
+        # Number of pruned entries already cut from the front of the arrays
+        # Entries are numbered from the first one ever added, so a window's
+        # head stays valid when the arrays are compacted
+        self.base = 0
+        # Tokens of every entry ever added
+        self.added = 0
+        # Per standard window: number of the oldest entry inside it, and the
+        # tokens of entries that already left it
+        # A window's sum is added - expired, so adding an entry touches one counter
+        self.heads: List[int] = [0] * len(_STANDARD_WINDOWS)
+        self.expired: List[int] = [0] * len(_STANDARD_WINDOWS)
+    
+    # Add an entry, new entries are inside every window
+    # An entry older than the newest one (its time was read outside the lock,
+    # or passed in as now) is stamped with the newest time, keeping the order
+    def append(self, timestamp: float, tokens: int):
+        
+        timestamps = self.timestamps
+        if timestamps and timestamp < timestamps[-1]:
+            timestamp = timestamps[-1]
+        
+        timestamps.append(timestamp)
+        self.tokens.append(tokens)
+        self.added += tokens
+    
+    # Move a window's head past entries older than cutoff and return its sum
+    # Only the entries that left the window are summed
+    def window_sum(self, slot: int, cutoff: float) -> int:
+        
+        timestamps = self.timestamps
+        head = self.heads[slot] - self.base
+        
+        # Oldest entry in the window is still inside it (the usual case)
+        if head >= len(timestamps) or timestamps[head] >= cutoff:
+            return self.added - self.expired[slot]
+        
+        position = bisect_left(timestamps, cutoff, head)
+        self.expired[slot] += sum(self.tokens[head:position])
+        self.heads[slot] = position + self.base
+        
+        return self.added - self.expired[slot]
+    
+    # Drop entries older than cutoff
+    # A window that still counted a dropped entry takes it out of its sum
+    def prune(self, cutoff: float):
+        
+        timestamps = self.timestamps
+        start = self.start
+        
+        # Nothing old enough to drop (the usual case)
+        if start >= len(timestamps) or timestamps[start] >= cutoff:
+            return
+        
+        self._drop(bisect_left(timestamps, cutoff, start))
+    
+    # Drop the oldest entries so at most keep entries are left
+    def trim(self, keep: int):
+        
+        position = len(self.timestamps) - keep
+        if position > self.start:
+            self._drop(position)
+    
+    # Drop entries before position (an index into the arrays)
+    def _drop(self, position: int):
+        
+        base = self.base
+        heads, expired = self.heads, self.expired
+        for slot, head in enumerate(heads):
+            head -= base
+            if head < position:
+                expired[slot] += sum(self.tokens[head:position])
+                heads[slot] = position + base
+        
+        # Cut dropped entries from the arrays once they are more than half
+        if position > len(self.timestamps) // 2:
+            del self.timestamps[:position]
+            del self.tokens[:position]
+            self.base = base + position
+            position = 0
+        
+        self.start = position
+    
+    # Sum tokens at or after cutoff (for windows without a running sum)
+    def scan(self, cutoff: float) -> int:
+        
+        position = bisect_left(self.timestamps, cutoff, self.start)
+        return sum(self.tokens[position:])
+
+# Number of lock shards (power of two, so a mask picks the shard)
+_SHARD_COUNT = 16
+_SHARD_MASK = _SHARD_COUNT - 1
+
+# Build the TokenTracker usage getter method for one standard window
+# The window size and its running-sum slot are fixed in the closure,
+# so a call skips the window lookup and the retention update
+# (standard windows are always covered by the default retention)
+def _window_getter(window_seconds: int, name: str):
+    
+    slot = _WINDOW_SLOT[window_seconds]
+    
+    def get_usage(self, model: str, now: Optional[float] = None) -> int:
+        
+        current_time = time.monotonic() if now is None else now
+        
+        shard = hash(model) & _SHARD_MASK
+        with self._locks[shard]:
+            log = self._usage_shards[shard].get(model)
+            if log is None:
+                return 0
+            
+            log.prune(current_time - self._retention_seconds)
+            return log.window_sum(slot, current_time - window_seconds)
+    
+    get_usage.__name__ = name
+    get_usage.__qualname__ = f"TokenTracker.{name}"
+    return get_usage
+
 # This class tracks how many tokens each model uses
 class TokenTracker:
     
     
-    def __init__(self):
-        # Store token usage with timestamp
-        self._usage: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
-        self._lock = Lock()
+    # max_events_per_model: most entries kept per model, oldest are dropped
+    # past it. Keeps memory bounded for models whose usage windows are never
+    # queried (queries are what prune old entries). Should stay above the
+    # number of events expected in the longest window, or window sums undercount
+    def __init__(self, max_events_per_model: int = 100_000):
+        # Locks are sharded by model name, so requests for different models
+        # do not wait on each other. Each shard owns its own dicts
+        self._locks: List[Lock] = [Lock() for _ in range(_SHARD_COUNT)]
+        
+        # Store token usage with timestamp (oldest first) for each model
+        # Timestamps come from time.monotonic(), so clock changes can't reorder them
+        self._usage_shards: List[Dict[str, _UsageLog]] = [
+            defaultdict(_UsageLog) for _ in range(_SHARD_COUNT)
+        ]
         
         # Store total tokens used per model (all time)
-        self._total_usage: Dict[str, int] = defaultdict(int)
+        self._total_shards: List[Dict[str, int]] = [
+            defaultdict(int) for _ in range(_SHARD_COUNT)
+        ]
+        
+        # How long entries are kept: twice the longest window asked for so far
+        # (starts at 2 hours, enough for the hourly cooldown check)
+        self._retention_seconds = 2 * 3600
+        self._retention_lock = Lock()
+        
+        self._max_events_per_model = max_events_per_model
+        
+        # Usage key of each provider ("provider:<name>"), built once per provider
+        # Keys are interned, like the model names from config
+        self._provider_keys: Dict[str, str] = {}
+    
+    # Hold every shard lock, always taken in the same order
+    @contextmanager
+    def _all_locks(self) -> Iterator[None]:
+        
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
     
     # Save token usage when a model generates output
-    def record_usage(self, model: str, tokens: int, provider: str = None):
+    # Model and provider entries may sit in different shards,
+    # each one is recorded under its own lock
+    # now: time.monotonic() value already read by the caller (optional)
+    def record_usage(
+        self,
+        model: str,
+        tokens: int,
+        provider: str = None,
+        now: Optional[float] = None
+    ):
         
-        with self._lock:
-            timestamp = time.time()
-            
-            # Save usage for model with time
-            self._usage[model].append((timestamp, tokens))
-            
-           # Increase total token count
-            self._total_usage[model] += tokens
-            
-            # If provider specified, track provider totals too
-            if provider:
-                provider_key = f"provider:{provider}"
-                self._usage[provider_key].append((timestamp, tokens))
-                self._total_usage[provider_key] += tokens
+        timestamp = time.monotonic() if now is None else now
+        
+        shard = hash(model) & _SHARD_MASK
+        with self._locks[shard]:
+            self._record_locked(shard, model, tokens, timestamp)
+        
+        # If provider specified, track provider totals too
+        if provider:
+            self._record_provider(provider, tokens, timestamp)
+    
+    # Save token usage and return the model's usage in the window
+    # Both happen under one acquisition of the model's shard lock
+    def record_and_get_usage(
+        self,
+        model: str,
+        tokens: int,
+        provider: str = None,
+        window_seconds: int = 3600,
+        now: Optional[float] = None
+    ) -> int:
+        
+        timestamp = time.monotonic() if now is None else now
+        
+        shard = hash(model) & _SHARD_MASK
+        with self._locks[shard]:
+            self._record_locked(shard, model, tokens, timestamp)
+            usage = self._usage_in_window_locked(shard, model, window_seconds, timestamp)
+        
+        if provider:
+            self._record_provider(provider, tokens, timestamp)
+        
+        return usage
+    
+    # Save many (model, tokens) entries at once (e.g. chunks buffered
+    # while streaming a response, flushed once at the end)
+    # The clock is read once and each shard lock is taken once
+    def record_usage_bulk(
+        self,
+        entries: Iterable[Tuple[str, int]],
+        now: Optional[float] = None
+    ):
+        
+        timestamp = time.monotonic() if now is None else now
+        
+        # Group entries by shard first, so no lock is held while grouping
+        by_shard: Dict[int, List[Tuple[str, int]]] = defaultdict(list)
+        for model, tokens in entries:
+            by_shard[hash(model) & _SHARD_MASK].append((model, tokens))
+        
+        for shard, shard_entries in by_shard.items():
+            with self._locks[shard]:
+                for model, tokens in shard_entries:
+                    self._record_locked(shard, model, tokens, timestamp)
+    
+    # Record usage under the provider's key
+    def _record_provider(self, provider: str, tokens: int, timestamp: float):
+        
+        provider_key = self._provider_keys.get(provider)
+        if provider_key is None:
+            # Same key for the same provider, a race here is harmless
+            provider_key = sys.intern(f"provider:{provider}")
+            self._provider_keys[provider] = provider_key
+        
+        shard = hash(provider_key) & _SHARD_MASK
+        with self._locks[shard]:
+            self._record_locked(shard, provider_key, tokens, timestamp)
+    
+    # Record usage (caller must hold the shard's lock)
+    def _record_locked(self, shard: int, model: str, tokens: int, timestamp: float):
+        
+        # Save usage for model with time
+        log = self._usage_shards[shard][model]
+        log.append(timestamp, tokens)
+        
+        # Too many entries kept, drop the oldest
+        # An eighth of the limit goes at once, so this does not run on every call
+        if len(log.timestamps) - log.start > self._max_events_per_model:
+            log.trim(self._max_events_per_model - self._max_events_per_model // 8)
+        
+        # Increase total token count
+        self._total_shards[shard][model] += tokens
     
     # Get tokens used in a recent time window (like last hour)
-    def get_usage_in_window(self, model: str, window_seconds: int = 3600) -> int:
+    def get_usage_in_window(
+        self,
+        model: str,
+        window_seconds: int = 3600,
+        now: Optional[float] = None
+    ) -> int:
         
-        with self._lock:
-            if model not in self._usage:
-                return 0
-            
-            current_time = time.time()
-            cutoff_time = current_time - window_seconds
-            
-            # Count only tokens inside the time window
-            total = sum(
-                tokens 
-                for timestamp, tokens in self._usage[model]
-                if timestamp >= cutoff_time
-            )
-            
-            # Remove very old entries to save memory
-            cleanup_cutoff = current_time - (window_seconds * 2)
-            self._usage[model] = [
-                (ts, tok) for ts, tok in self._usage[model]
-                if ts >= cleanup_cutoff
-            ]
-            
-            return total
+        current_time = time.monotonic() if now is None else now
+        
+        shard = hash(model) & _SHARD_MASK
+        with self._locks[shard]:
+            return self._usage_in_window_locked(shard, model, window_seconds, current_time)
+    
+    # Windowed usage (caller must hold the shard's lock)
+    def _usage_in_window_locked(
+        self,
+        shard: int,
+        model: str,
+        window_seconds: int,
+        current_time: float
+    ) -> int:
+        
+        log = self._usage_shards[shard].get(model)
+        if log is None:
+            return 0
+        
+        cutoff_time = current_time - window_seconds
+        
+        # Longer window than any before, keep entries long enough for it
+        # (shared by all shards, so it has its own lock)
+        if window_seconds * 2 > self._retention_seconds:
+            with self._retention_lock:
+                self._retention_seconds = max(self._retention_seconds, window_seconds * 2)
+        
+        # Remove very old entries to save memory
+        # Entries are in time order, so only the oldest ones are dropped
+        log.prune(current_time - self._retention_seconds)
+        
+        # Standard windows keep a running sum, only expired entries are visited
+        slot = _WINDOW_SLOT.get(window_seconds)
+        if slot is not None:
+            return log.window_sum(slot, cutoff_time)
+        
+        # Count only tokens inside the time window
+        return log.scan(cutoff_time)
     
     # Get total tokens used by a model (from start)
     def get_total_usage(self, model: str) -> int:
        
-        with self._lock:
-            return self._total_usage.get(model, 0)
+        shard = hash(model) & _SHARD_MASK
+        with self._locks[shard]:
+            return self._total_shards[shard].get(model, 0)
     
     # Get total usage for all models
     def get_all_usage(self) -> Dict[str, int]:
         
-        with self._lock:
-            return dict(self._total_usage)
+        with self._all_locks():
+            all_usage: Dict[str, int] = {}
+            for totals in self._total_shards:
+                all_usage.update(totals)
+            return all_usage
     
-    # Shortcut to get last hour usage
-    def get_usage_last_hour(self, model: str) -> int:
-       
-        return self.get_usage_in_window(model, window_seconds=3600)
+    # Shortcut to get last hour usage (see _window_getter)
+    get_usage_last_hour = _window_getter(3600, "get_usage_last_hour")
     
-    # Shortcut to get last minute usage
-    def get_usage_last_minute(self, model: str) -> int:
-       
-        return self.get_usage_in_window(model, window_seconds=60)
+    # Shortcut to get last minute usage (see _window_getter)
+    get_usage_last_minute = _window_getter(60, "get_usage_last_minute")
     
     # Reset tracking data
     def reset_usage(self, model: str = None):
         
-        with self._lock:
-            if model:
-                self._usage.pop(model, None)
-                self._total_usage.pop(model, None)
-            else:
-                self._usage.clear()
-                self._total_usage.clear()
+        if model:
+            shard = hash(model) & _SHARD_MASK
+            with self._locks[shard]:
+                self._usage_shards[shard].pop(model, None)
+                self._total_shards[shard].pop(model, None)
+            return
+        
+        with self._all_locks():
+            for usage in self._usage_shards:
+                usage.clear()
+            for totals in self._total_shards:
+                totals.clear()
 
 # Create one global tracker object
 tracker = TokenTracker()
 
-# Old function name (still works)
-def record_usage(model: str, tokens: int):
+# Old function name (still works, deprecated)
+def _legacy_record_usage(model: str, tokens: int):
     
     tracker.record_usage(model, tokens)
 
-# Old function name (still works)
-def get_usage(model: str) -> int:
+# Old function name (still works, deprecated)
+def _legacy_get_usage(model: str) -> int:
     
     return tracker.get_total_usage(model)
 
+# Backward compatibility: {old name: (object, what to use instead)}
+_LEGACY = {
+    "record_usage": (_legacy_record_usage, "tracker.record_usage()"),
+    "get_usage": (_legacy_get_usage, "tracker.get_total_usage()")
+}
+
+# Old names are only looked up when used, and warn that they are deprecated
+def __getattr__(name):
+    
+    legacy = _LEGACY.get(name)
+    if legacy is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    
+    value, replacement = legacy
+    warnings.warn(
+        f"{__name__}.{name} is deprecated, use {replacement} instead",
+        DeprecationWarning,
+        stacklevel=2
+    )
+    return value
 